@@ -3,16 +3,86 @@ Flask веб-приложение для рекомендательной сис
 Предоставляет веб-интерфейс для получения рекомендаций и просмотра аналитики.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, abort, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import pandas as pd
+import gzip
+import hmac
 import os
 from recommendation_engine import RecommendationSystem
 from data_analyzer import DataAnalyzer
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON провайдер Flask на основе orjson.
+    Быстрее стандартного json и умеет сериализовать типы NumPy.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def to_records(df):
+    """
+    Преобразует датафрейм в список словарей.
+    Быстрее, чем to_dict('records'): значения берутся прямо из колонок NumPy.
+    
+    Args:
+        df: датафрейм
+        
+    Returns:
+        list: список словарей (строк датафрейма)
+    """
+    columns = df.columns.tolist()
+    return [dict(zip(columns, row)) for row in zip(*(df[c].to_numpy() for c in columns))]
+
+
+def gzip_json(obj):
+    """
+    Сериализует объект в JSON и сжимает его gzip.
+    
+    Args:
+        obj: объект для сериализации
+        
+    Returns:
+        bytes: сжатый JSON
+    """
+    return gzip.compress(app.json.dumps(obj).encode())
+
+
+def gzip_response(body):
+    """
+    Создает ответ с заранее сжатым JSON.
+    
+    Args:
+        body: JSON, сжатый gzip
+        
+    Returns:
+        Response: ответ Flask
+    """
+    return Response(body, headers={
+        'Content-Encoding': 'gzip',
+        'Content-Type': 'application/json',
+        'Vary': 'Accept-Encoding'
+    })
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
-recommendation_system = RecommendationSystem()
-analyzer = None
+# Значения параметра num, для которых ответ /api/popular готовится заранее
+POPULAR_CACHE_SIZES = (5, 10, 20)
+
+# Токен для POST /refresh; без него endpoint отклоняет все запросы
+app.config['REFRESH_TOKEN'] = os.environ.get('REFRESH_TOKEN')
 
 
 def initialize_system():
@@ -20,8 +90,6 @@ def initialize_system():
     Инициализирует систему и загружает данные.
     Вызывается при запуске приложения.
     """
-    global recommendation_system, analyzer
-    
     if not os.path.exists('data/products.csv') or not os.path.exists('data/purchases.csv'):
         print("Данные не найдены. Генерируем тестовые данные...")
         from data_generator import generate_sample_data, save_data_to_csv
@@ -31,14 +99,44 @@ def initialize_system():
         save_data_to_csv(products, purchases)
     
     print("Загрузка данных...")
+    load_data()
+    
+    print("Система готова к работе!")
+
+
+def load_data():
+    """
+    Загружает данные и заранее строит аналитику.
+    Графики и статистика не меняются между загрузками, поэтому
+    страница аналитики отдает готовые результаты из app.config.
+    
+    Все объекты строятся заново в локальных переменных и подменяются
+    одним присваиванием app.config['state'], поэтому запросы, которые
+    выполняются во время перезагрузки, видят либо старые, либо новые данные целиком.
+    """
+    recommendation_system = RecommendationSystem()
     recommendation_system.load_data()
     
     analyzer = DataAnalyzer(
         recommendation_system.products_df,
-        recommendation_system.purchases_df
+        recommendation_system.purchases_df,
+        id_to_name=recommendation_system.id_to_name
     )
     
-    print("Система готова к работе!")
+    stats = analyzer.get_summary_statistics()
+    
+    app.config['state'] = {
+        'recommendation_system': recommendation_system,
+        'dashboard': analyzer.create_dashboard(),
+        'stats': stats,
+        'category_stats': analyzer.get_category_statistics().to_dict('index'),
+        # Готовые сжатые ответы для статичных API endpoints
+        'popular_gz': {
+            num: gzip_json(to_records(recommendation_system.get_popular_products(num)))
+            for num in POPULAR_CACHE_SIZES
+        },
+        'stats_gz': gzip_json(stats)
+    }
 
 
 @app.route('/')
@@ -47,6 +145,7 @@ def index():
     Главная страница приложения.
     Показывает форму для выбора пользователя.
     """
+    recommendation_system = app.config['state']['recommendation_system']
     users = recommendation_system.purchases_df['user_id'].unique().tolist()
     users.sort()
     
@@ -61,6 +160,8 @@ def recommendations(user_id):
     Args:
         user_id: ID пользователя
     """
+    recommendation_system = app.config['state']['recommendation_system']
+    
     user_purchases = recommendation_system.get_user_purchases(user_id)
     
     recommendations_df = recommendation_system.get_recommendations(user_id, num_recommendations=10)
@@ -82,21 +183,37 @@ def analytics():
     Страница с аналитикой и визуализацией данных.
     Показывает различные графики и статистику.
     """
-    stats = analyzer.get_summary_statistics()
-    
-    category_stats = analyzer.get_category_statistics()
-    category_stats_dict = category_stats.to_dict('index')
-    
-    dashboard = analyzer.create_dashboard()
+    state = app.config['state']
     
     return render_template(
         'analytics.html',
-        stats=stats,
-        category_stats=category_stats_dict,
-        dashboard=dashboard
+        stats=state['stats'],
+        category_stats=state['category_stats'],
+        dashboard=state['dashboard']
     )
 
 
+def refresh():
+    """
+    Перезагружает данные и пересчитывает кеши.
+    Нужно вызывать после изменения файлов с покупками или товарами.
+    Требует заголовок X-Refresh-Token, совпадающий с REFRESH_TOKEN.
+    
+    Регистрируется только при запуске через python app.py: под gunicorn
+    запрос обновил бы лишь один воркер, там данные обновляются перезапуском.
+    
+    Returns:
+        JSON со статусом
+    """
+    token = app.config['REFRESH_TOKEN']
+    supplied = request.headers.get('X-Refresh-Token', '')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        abort(403)
+    
+    load_data()
+    return jsonify({'status': 'ok'})
+
+
 @app.route('/api/recommendations/<int:user_id>')
 def api_recommendations(user_id):
     """
@@ -109,9 +226,10 @@ def api_recommendations(user_id):
         JSON с рекомендациями
     """
     num_recommendations = request.args.get('num', default=5, type=int)
+    recommendation_system = app.config['state']['recommendation_system']
     recommendations_df = recommendation_system.get_recommendations(user_id, num_recommendations)
     
-    return jsonify(recommendations_df.to_dict('records'))
+    return jsonify(to_records(recommendations_df))
 
 
 @app.route('/api/popular')
@@ -123,9 +241,15 @@ def api_popular():
         JSON с популярными товарами
     """
     num_products = request.args.get('num', default=5, type=int)
-    popular_df = recommendation_system.get_popular_products(num_products)
+    state = app.config['state']
+    
+    cached = state['popular_gz'].get(num_products)
+    if cached is not None and request.accept_encodings['gzip'] > 0:
+        return gzip_response(cached)
     
-    return jsonify(popular_df.to_dict('records'))
+    popular_df = state['recommendation_system'].get_popular_products(num_products)
+    
+    return jsonify(to_records(popular_df))
 
 
 @app.route('/api/stats')
@@ -136,13 +260,19 @@ def api_stats():
     Returns:
         JSON со статистикой
     """
-    stats = analyzer.get_summary_statistics()
-    return jsonify(stats)
+    state = app.config['state']
+    
+    if request.accept_encodings['gzip'] > 0:
+        return gzip_response(state['stats_gz'])
+    
+    return jsonify(state['stats'])
 
 
 if __name__ == '__main__':
     initialize_system()
     
+    app.add_url_rule('/refresh', view_func=refresh, methods=['POST'])
+    
     print("\nЗапуск веб-сервера...")
     print("Откройте браузер и перейдите по адресу: http://127.0.0.1:5000")
     
@@ -3,6 +3,7 @@
 Создает графики и статистику для понимания поведения пользователей.
 """
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -14,17 +15,35 @@ class DataAnalyzer:
     Класс для анализа данных покупок и создания визуализаций.
     """
     
-    def __init__(self, products_df, purchases_df):
+    def __init__(self, products_df, purchases_df, id_to_name=None):
         """
         Инициализация анализатора данных.
         
         Args:
             products_df: датафрейм с товарами
             purchases_df: датафрейм с покупками
+            id_to_name: готовый словарь product_id -> название
+                (например, RecommendationSystem.id_to_name); если не задан, строится заново
         """
         self.products_df = products_df
         self.purchases_df = purchases_df
         
+        # Справочник названий по product_id, чтобы не сканировать таблицу товаров в циклах
+        if id_to_name is None:
+            id_to_name = dict(zip(products_df['product_id'].values, products_df['name'].values))
+        self._id_to_name = id_to_name
+        
+        # Объединенная таблица покупок и товаров нужна почти всем методам
+        self._merged = purchases_df.merge(products_df, on='product_id')
+        self._merged['category'] = self._merged['category'].astype('category')
+        
+        self._user_ids = purchases_df['user_id'].to_numpy()
+        
+        # Коды товаров в покупках для быстрого подсчета через bincount
+        self._product_codes = purchases_df['product_id'].astype('category')
+        
+        self._summary_statistics = None
+        
     def get_category_statistics(self):
         """
         Вычисляет статистику по категориям товаров.
@@ -32,9 +51,10 @@ class DataAnalyzer:
         Returns:
             DataFrame: статистика по каждой категории
         """
-        merged_data = self.purchases_df.merge(self.products_df, on='product_id')
+        merged_data = self._merged
         
-        category_stats = merged_data.groupby('category').agg({
+        # category хранится как category dtype, поэтому группировка идет по целочисленным кодам
+        category_stats = merged_data.groupby('category', observed=True).agg({
             'product_id': 'count',  # количество покупок
             'rating': 'mean',       # средний рейтинг
             'price': 'sum'          # общая сумма продаж
@@ -53,7 +73,7 @@ class DataAnalyzer:
         Returns:
             str: HTML код графика
         """
-        merged_data = self.purchases_df.merge(self.products_df, on='product_id')
+        merged_data = self._merged
         
         category_counts = merged_data['category'].value_counts()
         
@@ -93,15 +113,18 @@ class DataAnalyzer:
         Returns:
             str: HTML код графика
         """
-        product_purchases = self.purchases_df['product_id'].value_counts().head(top_n)
+        codes = self._product_codes.cat.codes.to_numpy()
+        categories = self._product_codes.cat.categories
+        counts = np.bincount(codes, minlength=len(categories))
         
-        product_names = []
-        for product_id in product_purchases.index:
-            name = self.products_df[self.products_df['product_id'] == product_id]['name'].values[0]
-            product_names.append(name)
+        k = min(top_n, len(counts))
+        idx = np.argpartition(-counts, k - 1)[:k]
+        idx = idx[np.argsort(-counts[idx], kind='stable')]
+        
+        product_names = [self._id_to_name[product_id] for product_id in categories[idx]]
         
         fig = px.bar(
-            x=product_purchases.values,
+            x=counts[idx],
             y=product_names,
             orientation='h',
             labels={'x': 'Количество покупок', 'y': 'Товар'},
@@ -117,10 +140,12 @@ class DataAnalyzer:
         Returns:
             str: HTML код графика
         """
-        user_purchases = self.purchases_df.groupby('user_id').size()
+        # id пользователей - небольшие целые числа, поэтому считаем без groupby
+        user_purchases = np.bincount(self._user_ids)
+        user_purchases = user_purchases[user_purchases > 0]
         
         fig = px.histogram(
-            x=user_purchases.values,
+            x=user_purchases,
             nbins=20,
             labels={'x': 'Количество покупок', 'y': 'Количество пользователей'},
             title='Распределение активности пользователей'
@@ -135,7 +160,7 @@ class DataAnalyzer:
         Returns:
             str: HTML код графика
         """
-        merged_data = self.purchases_df.merge(self.products_df, on='product_id')
+        merged_data = self._merged
         
         fig = px.box(
             merged_data,
@@ -171,19 +196,31 @@ class DataAnalyzer:
         Returns:
             dict: словарь со статистикой
         """
-        merged_data = self.purchases_df.merge(self.products_df, on='product_id')
+        # Данные анализатора неизменны, поэтому статистику считаем один раз
+        if self._summary_statistics is not None:
+            return dict(self._summary_statistics)
+        
+        merged_data = self._merged
+        
+        # Самая частая категория: argmax по количеству покупок каждого кода
+        categories = merged_data['category'].cat
+        most_popular_category = categories.categories[
+            np.bincount(categories.codes.to_numpy(), minlength=len(categories.categories)).argmax()
+        ]
         
         stats = {
-            'total_users': self.purchases_df['user_id'].nunique(),
+            'total_users': len(np.unique(self._user_ids)),
             'total_products': self.products_df.shape[0],
             'total_purchases': self.purchases_df.shape[0],
             'avg_rating': round(self.purchases_df['rating'].mean(), 2),
             'total_revenue': merged_data['price'].sum(),
             'avg_purchase_price': round(merged_data['price'].mean(), 2),
-            'most_popular_category': merged_data['category'].mode()[0]
+            'most_popular_category': most_popular_category
         }
         
-        return stats
+        self._summary_statistics = stats
+        
+        return dict(stats)
 
 
 if __name__ == '__main__':
@@ -5,7 +5,6 @@
 
 import pandas as pd
 import numpy as np
-import random
 
 
 def generate_sample_data():
@@ -31,39 +30,38 @@ def generate_sample_data():
         'Дом': ['Подушка', 'Одеяло', 'Лампа', 'Ваза', 'Рамка для фото', 'Свечи']
     }
     
-    products = []
-    product_id = 1
+    rng = np.random.default_rng()
     
-    for category in categories:
-        for product_name in products_by_category[category]:
-            price = random.randint(100, 10000)
-            products.append({
-                'product_id': product_id,
-                'name': product_name,
-                'category': category,
-                'price': price
-            })
-            product_id += 1
+    names = [name for category in categories for name in products_by_category[category]]
+    n_products = len(names)
     
-    products_df = pd.DataFrame(products)
+    products_df = pd.DataFrame({
+        'product_id': np.arange(1, n_products + 1),
+        'name': names,
+        'category': np.repeat(categories, [len(products_by_category[c]) for c in categories]),
+        'price': rng.integers(100, 10001, size=n_products)
+    })
     
-    purchases = []
     num_users = 50
     
-    for user_id in range(1, num_users + 1):
-        num_purchases = random.randint(3, 15)
-        
-        purchased_products = random.sample(range(1, len(products) + 1), num_purchases)
-        
-        for prod_id in purchased_products:
-            rating = random.randint(1, 5)
-            purchases.append({
-                'user_id': user_id,
-                'product_id': prod_id,
-                'rating': rating
-            })
-    
-    purchases_df = pd.DataFrame(purchases)
+    # Количество покупок для каждого пользователя
+    num_purchases = rng.integers(3, 16, size=num_users)
+    total = num_purchases.sum()
+    
+    user_ids = np.repeat(np.arange(1, num_users + 1), num_purchases)
+    
+    # Товары внутри одного пользователя не повторяются
+    product_ids = np.empty(total, dtype=np.int64)
+    offset = 0
+    for k in num_purchases:
+        product_ids[offset:offset + k] = rng.choice(n_products, size=k, replace=False) + 1
+        offset += k
+    
+    purchases_df = pd.DataFrame({
+        'user_id': user_ids,
+        'product_id': product_ids,
+        'rating': rng.integers(1, 6, size=total)
+    })
     
     return products_df, purchases_df
 
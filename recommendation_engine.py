@@ -3,8 +3,11 @@
 Использует алгоритм k-ближайших соседей для поиска похожих пользователей.
 """
 
+import functools
+
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 
 
@@ -22,6 +25,20 @@ class RecommendationSystem:
         self.products_df = None
         self.purchases_df = None
         self.user_item_matrix = None
+        self._purchases_user = None
+        self._user_rows = {}
+        self._users = None
+        self._products = None
+        self._user_index = {}
+        self._sim = None
+        self.id_to_name = {}
+        self.id_to_category = {}
+        self.id_to_price = {}
+        
+        # Данные не меняются до следующей загрузки, поэтому одинаковые запросы
+        # отдаются из кеша; load_data очищает его
+        self._recommendations_cache = functools.lru_cache(maxsize=1024)(self._compute_recommendations)
+        self._popular_cache = functools.lru_cache(maxsize=128)(self._compute_popular_products)
         
     def load_data(self, products_path='data/products.csv', purchases_path='data/purchases.csv'):
         """
@@ -31,16 +48,58 @@ class RecommendationSystem:
             products_path: путь к файлу с товарами
             purchases_path: путь к файлу с покупками
         """
-        self.products_df = pd.read_csv(products_path)
-        self.purchases_df = pd.read_csv(purchases_path)
+        # Компактные типы: значения id, оценок и цен помещаются в int32/int8,
+        # а строковые колонки с повторами хранятся как category.
+        # Движок pyarrow разбирает CSV многопоточно и не угадывает типы
+        self.products_df = pd.read_csv(products_path, engine='pyarrow', dtype={
+            'product_id': np.int32,
+            'name': 'category',
+            'category': 'category',
+            'price': np.int32
+        })
+        self.purchases_df = pd.read_csv(purchases_path, engine='pyarrow', dtype={
+            'user_id': np.int32,
+            'product_id': np.int32,
+            'rating': np.int8
+        })
+        
+        # Справочники по product_id для сборки результатов без merge;
+        # id_to_name также используется DataAnalyzer
+        product_ids = self.products_df['product_id'].to_numpy()
+        self.id_to_name = dict(zip(product_ids, self.products_df['name'].to_numpy()))
+        self.id_to_category = dict(zip(product_ids, self.products_df['category'].to_numpy()))
+        self.id_to_price = dict(zip(product_ids, self.products_df['price'].to_numpy()))
+        
+        # Колонка user_id как ndarray для фильтрации без накладных расходов pandas
+        self._purchases_user = self.purchases_df['user_id'].to_numpy()
         
-        self.user_item_matrix = self.purchases_df.pivot_table(
-            index='user_id',
-            columns='product_id',
-            values='rating',
-            fill_value=0
+        # Номера строк покупок каждого пользователя (в исходном порядке)
+        order = np.argsort(self._purchases_user, kind='stable')
+        uids, starts = np.unique(self._purchases_user[order], return_index=True)
+        self._user_rows = dict(zip(uids.tolist(), np.split(order, starts[1:])))
+        
+        # Разреженная матрица пользователь-товар: строки - пользователи,
+        # столбцы - товары (оба в порядке возрастания id), значения - оценки
+        users = pd.Categorical(self.purchases_df['user_id'])
+        products = pd.Categorical(self.purchases_df['product_id'])
+        self._users = users.categories.to_numpy()
+        self._products = products.categories.to_numpy()
+        
+        self.user_item_matrix = csr_matrix(
+            (
+                self.purchases_df['rating'].to_numpy(dtype=np.float32),
+                (users.codes, products.codes)
+            ),
+            shape=(len(self._users), len(self._products))
         )
         
+        # Матрица схожести не меняется между загрузками, поэтому считаем ее один раз
+        self._user_index = {uid: i for i, uid in enumerate(self._users)}
+        self._sim = cosine_similarity(self.user_item_matrix, dense_output=True)
+        
+        self._recommendations_cache.cache_clear()
+        self._popular_cache.cache_clear()
+        
     def find_similar_users(self, user_id, num_similar=5):
         """
         Находит похожих пользователей на основе их покупок.
@@ -52,20 +111,23 @@ class RecommendationSystem:
         Returns:
             list: список ID похожих пользователей
         """
-        if user_id not in self.user_item_matrix.index:
+        i = self._user_index.get(user_id)
+        if i is None:
             return []
         
-        user_similarity = cosine_similarity(self.user_item_matrix)
+        # Сам пользователь не должен попасть в список похожих
+        row = self._sim[i].copy()
+        row[i] = -np.inf
         
-        similarity_df = pd.DataFrame(
-            user_similarity,
-            index=self.user_item_matrix.index,
-            columns=self.user_item_matrix.index
-        )
+        k = min(num_similar, len(row) - 1)
+        if k <= 0:
+            return []
         
-        similar_users = similarity_df[user_id].sort_values(ascending=False)[1:num_similar+1]
+        # Частичная сортировка: упорядочиваем только k лучших
+        order = np.argpartition(-row, k - 1)[:k]
+        order = order[np.argsort(-row[order], kind='stable')]
         
-        return similar_users.index.tolist()
+        return self._users[order].tolist()
     
     def get_recommendations(self, user_id, num_recommendations=5):
         """
@@ -84,36 +146,39 @@ class RecommendationSystem:
         Returns:
             DataFrame: датафрейм с рекомендованными товарами
         """
+        # Копия, чтобы изменения у вызывающего не попали в кеш
+        return self._recommendations_cache(user_id, num_recommendations).copy()
+    
+    def _compute_recommendations(self, user_id, num_recommendations):
+        """
+        Вычисляет рекомендации без кеша (см. get_recommendations).
+        """
         similar_users = self.find_similar_users(user_id)
         
         if not similar_users:
             return self.get_popular_products(num_recommendations)
         
-        user_purchases = self.purchases_df[self.purchases_df['user_id'] == user_id]['product_id'].tolist()
+        matrix = self.user_item_matrix
+        num_products = matrix.shape[1]
         
-        similar_purchases = self.purchases_df[
-            (self.purchases_df['user_id'].isin(similar_users)) &
-            (~self.purchases_df['product_id'].isin(user_purchases))
-        ]
+        # Строки похожих пользователей: indices - столбцы товаров, data - оценки
+        similar_rows = matrix[[self._user_index[uid] for uid in similar_users]]
         
-        # Группируем по товару и считаем средний рейтинг
-        recommendations = similar_purchases.groupby('product_id').agg({
-            'rating': 'mean',
-            'user_id': 'count'
-        }).rename(columns={'user_id': 'count'})
+        # Сумма оценок и количество покупок каждого товара за один проход
+        sums = np.bincount(similar_rows.indices, weights=similar_rows.data, minlength=num_products)
+        counts = np.bincount(similar_rows.indices, minlength=num_products)
         
-        recommendations = recommendations.sort_values(
-            by=['rating', 'count'],
-            ascending=False
-        ).head(num_recommendations)
+        # Исключаем товары, которые пользователь уже купил
+        i = self._user_index[user_id]
+        counts[matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]]] = 0
         
-        recommendations = recommendations.merge(
-            self.products_df,
-            left_index=True,
-            right_on='product_id'
-        )
+        candidates = np.flatnonzero(counts)
+        ratings = sums[candidates] / counts[candidates]
         
-        return recommendations[['product_id', 'name', 'category', 'price', 'rating', 'count']]
+        order = np.lexsort((-counts[candidates], -ratings))[:num_recommendations]
+        selected = candidates[order]
+        
+        return self._products_frame(self._products[selected], ratings[order], counts[selected])
     
     def get_popular_products(self, num_products=5):
         """
@@ -126,23 +191,47 @@ class RecommendationSystem:
         Returns:
             DataFrame: датафрейм с популярными товарами
         """
+        return self._popular_cache(num_products).copy()
+    
+    def _compute_popular_products(self, num_products):
+        """
+        Вычисляет популярные товары без кеша (см. get_popular_products).
+        """
         popular = self.purchases_df.groupby('product_id').agg({
             'rating': 'mean',
             'user_id': 'count'
         }).rename(columns={'user_id': 'count'})
         
-        popular = popular.sort_values(
-            by=['rating', 'count'],
-            ascending=False
-        ).head(num_products)
+        ratings = popular['rating'].to_numpy()
+        counts = popular['count'].to_numpy()
         
-        popular = popular.merge(
-            self.products_df,
-            left_index=True,
-            right_on='product_id'
-        )
+        order = np.lexsort((-counts, -ratings))[:num_products]
+        
+        return self._products_frame(popular.index.to_numpy()[order], ratings[order], counts[order])
+    
+    def _products_frame(self, product_ids, ratings, counts):
+        """
+        Собирает датафрейм с описанием товаров, их рейтингом и числом покупок.
+        Данные о товарах берутся из справочников по product_id.
+        
+        Args:
+            product_ids: массив ID товаров
+            ratings: массив средних оценок
+            counts: массив количества покупок
+            
+        Returns:
+            DataFrame: датафрейм с колонками product_id, name, category, price, rating, count
+        """
+        product_ids = product_ids.tolist()
         
-        return popular[['product_id', 'name', 'category', 'price', 'rating', 'count']]
+        return pd.DataFrame({
+            'product_id': product_ids,
+            'name': [self.id_to_name[i] for i in product_ids],
+            'category': [self.id_to_category[i] for i in product_ids],
+            'price': [self.id_to_price[i] for i in product_ids],
+            'rating': ratings,
+            'count': counts
+        })
     
     def get_user_purchases(self, user_id):
         """
@@ -154,7 +243,8 @@ class RecommendationSystem:
         Returns:
             DataFrame: датафрейм с покупками пользователя
         """
-        user_data = self.purchases_df[self.purchases_df['user_id'] == user_id]
+        rows = self._user_rows.get(user_id, np.empty(0, dtype=np.intp))
+        user_data = self.purchases_df.iloc[rows]
         
         user_data = user_data.merge(
             self.products_df,
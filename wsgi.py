@@ -0,0 +1,14 @@
+"""
+Точка входа WSGI для запуска приложения в production через gunicorn.
+
+Запуск:
+    gunicorn -w 4 --preload wsgi:app
+
+С флагом --preload данные загружаются один раз в главном процессе до
+создания воркеров, и матрица схожести, объединенные таблицы и готовые
+графики разделяются между воркерами через copy-on-write.
+"""
+
+from app import app, initialize_system
+
+initialize_system()